@@ -1,127 +1,135 @@
-import asyncio
+import heapq
+import json
+import os
 import re
+import sys
+import threading
 import time
-from typing import Dict, Any, List
-
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-from fastapi.middleware.cors import CORSMiddleware
-from sse_starlette.sse import EventSourceResponse
+import warnings
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Any, Deque, List, Optional, Tuple
 
 # =========================================================
 # Magical Palace - Single-file Hospitality Chatbot Website
 # Run: python -m uvicorn app:app --reload --port 8000
 # Open: http://localhost:8000
+# Serverless: handler = app.lambda_handler
+#   (optional) python app.py --compile-artifact concierge_artifact.json
+#   and set CONCIERGE_ARTIFACT=concierge_artifact.json
+# Latency budget: CONCIERGE_BUDGET_MS (default 50), CONCIERGE_FUZZY=1 enables
+#   the typo-tolerant retrieval tier
 # =========================================================
+#
+# Only light stdlib modules are imported at module load. FastAPI, CORS and
+# sse_starlette are imported by create_app() the first time `app.app` is
+# looked up (what uvicorn does), and asyncio / EventSourceResponse only when a
+# stream is requested, so the Lambda handler never pays for them.
 
-app = FastAPI(title="Magical Palace Concierge")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # ok for local demo
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+ARTIFACT_PATH = os.environ.get("CONCIERGE_ARTIFACT", "")
+ARTIFACT_VERSION = 3
 
 # -----------------------------
 # "Compressed" data (Knowledge Cards)
 # Keep these short + bullet-based for speed.
 # -----------------------------
-KNOWLEDGE_CARDS: List[Dict[str, Any]] = [
-    {
-        "title": "Check-in and Check-out",
-        "tags": ["checkin", "checkout", "front desk", "arrival", "departure", "policy"],
-        "bullets": [
-            "Check-in: 2:00 PM",
-            "Check-out: 11:00 AM",
-            "Early check-in / late check-out depends on availability (Reception can confirm).",
-            "Luggage storage is available at Reception.",
-        ],
-    },
-    {
-        "title": "Breakfast",
-        "tags": ["breakfast", "food", "dining", "morning", "buffet", "menu"],
-        "bullets": [
-            "Breakfast is served daily: 7:00 AM – 10:30 AM",
-            "Ask for vegetarian options or allergies—staff can help.",
-            "If you’re leaving early, ask Reception about a packed breakfast.",
-        ],
-    },
-    {
-        "title": "Room Service",
-        "tags": ["room service", "in-room dining", "order food", "lunch", "dinner", "snacks", "call", "menu"],
-        "bullets": [
-            "Hours: 24/7 (limited menu after 11:00 PM).",
-            "To order: call Reception or use the in-room phone (Room Service).",
-            "Typical delivery time: 25–45 minutes (depends on rush hours).",
-            "Mention allergies or dietary preferences when ordering.",
-        ],
-    },
-    {
-        "title": "Wi-Fi access",
-        "tags": ["wifi", "internet", "password", "network"],
-        "bullets": [
-            "Connect to: MagicalPalace-Guest",
-            "If you need a password: Reception will provide it (may vary by booking).",
-            "If it won’t connect: forget the network → reconnect, or restart Wi-Fi on your device.",
-        ],
-    },
-    {
-        "title": "Pool and Gym",
-        "tags": ["pool", "gym", "fitness", "wellness"],
-        "bullets": [
-            "Gym: 6:00 AM – 10:00 PM",
-            "Pool: 7:00 AM – 8:00 PM",
-            "Bring your room key. Towels may be provided poolside.",
-        ],
-    },
-    {
-        "title": "Spa",
-        "tags": ["spa", "massage", "relax", "wellness"],
-        "bullets": [
-            "Spa requires booking.",
-            "Evenings are busy—book earlier if possible.",
-            "Tell us what you want: relaxation, deep tissue, or quick refresh.",
-        ],
-    },
-    {
-        "title": "Airport transfer",
-        "tags": ["airport", "pickup", "transfer", "taxi", "car"],
-        "bullets": [
-            "Airport pickup can be arranged via Reception.",
-            "Share flight number + arrival time.",
-            "Mention large luggage if you have it.",
-        ],
-    },
-    {
-        "title": "Nearby attraction: Riverfront Promenade",
-        "tags": ["attraction", "nearby", "river", "walk", "sunset", "photos"],
-        "bullets": [
-            "Best for: sunset views + calm walk",
-            "Go early if you want fewer crowds.",
-            "Carry water if it’s hot outside.",
-        ],
-    },
-    {
-        "title": "Nearby attraction: Old Town Walk",
-        "tags": ["attraction", "nearby", "old town", "history", "food", "evening"],
-        "bullets": [
-            "Best for: evening stroll + street food",
-            "Sunset timing feels nicest.",
-            "Tell me what you like (history / food / shopping) and I’ll suggest stops.",
-        ],
-    },
-    {
-        "title": "Nearby attraction: Local Handicraft Market",
-        "tags": ["attraction", "market", "shopping", "souvenirs", "crafts"],
-        "bullets": [
-            "Best for: gifts and local crafts",
-            "Bargaining is common—keep it polite.",
-            "Ask the hotel for recommended stalls.",
-        ],
-    },
-]
+def load_knowledge_cards() -> List[Dict[str, Any]]:
+    """Source cards. They are compiled into CARD_INDEX at import and not kept."""
+    return [
+        {
+            "title": "Check-in and Check-out",
+            "tags": ["checkin", "checkout", "front desk", "arrival", "departure", "policy"],
+            "bullets": [
+                "Check-in: 2:00 PM",
+                "Check-out: 11:00 AM",
+                "Early check-in / late check-out depends on availability (Reception can confirm).",
+                "Luggage storage is available at Reception.",
+            ],
+        },
+        {
+            "title": "Breakfast",
+            "tags": ["breakfast", "food", "dining", "morning", "buffet", "menu"],
+            "bullets": [
+                "Breakfast is served daily: 7:00 AM – 10:30 AM",
+                "Ask for vegetarian options or allergies—staff can help.",
+                "If you’re leaving early, ask Reception about a packed breakfast.",
+            ],
+        },
+        {
+            "title": "Room Service",
+            "tags": ["room service", "in-room dining", "order food", "lunch", "dinner", "snacks", "call", "menu"],
+            "bullets": [
+                "Hours: 24/7 (limited menu after 11:00 PM).",
+                "To order: call Reception or use the in-room phone (Room Service).",
+                "Typical delivery time: 25–45 minutes (depends on rush hours).",
+                "Mention allergies or dietary preferences when ordering.",
+            ],
+        },
+        {
+            "title": "Wi-Fi access",
+            "tags": ["wifi", "internet", "password", "network"],
+            "bullets": [
+                "Connect to: MagicalPalace-Guest",
+                "If you need a password: Reception will provide it (may vary by booking).",
+                "If it won’t connect: forget the network → reconnect, or restart Wi-Fi on your device.",
+            ],
+        },
+        {
+            "title": "Pool and Gym",
+            "tags": ["pool", "gym", "fitness", "wellness"],
+            "bullets": [
+                "Gym: 6:00 AM – 10:00 PM",
+                "Pool: 7:00 AM – 8:00 PM",
+                "Bring your room key. Towels may be provided poolside.",
+            ],
+        },
+        {
+            "title": "Spa",
+            "tags": ["spa", "massage", "relax", "wellness"],
+            "bullets": [
+                "Spa requires booking.",
+                "Evenings are busy—book earlier if possible.",
+                "Tell us what you want: relaxation, deep tissue, or quick refresh.",
+            ],
+        },
+        {
+            "title": "Airport transfer",
+            "tags": ["airport", "pickup", "transfer", "taxi", "car"],
+            "bullets": [
+                "Airport pickup can be arranged via Reception.",
+                "Share flight number + arrival time.",
+                "Mention large luggage if you have it.",
+            ],
+        },
+        {
+            "title": "Nearby attraction: Riverfront Promenade",
+            "tags": ["attraction", "nearby", "river", "walk", "sunset", "photos"],
+            "bullets": [
+                "Best for: sunset views + calm walk",
+                "Go early if you want fewer crowds.",
+                "Carry water if it’s hot outside.",
+            ],
+        },
+        {
+            "title": "Nearby attraction: Old Town Walk",
+            "tags": ["attraction", "nearby", "old town", "history", "food", "evening"],
+            "bullets": [
+                "Best for: evening stroll + street food",
+                "Sunset timing feels nicest.",
+                "Tell me what you like (history / food / shopping) and I’ll suggest stops.",
+            ],
+        },
+        {
+            "title": "Nearby attraction: Local Handicraft Market",
+            "tags": ["attraction", "market", "shopping", "souvenirs", "crafts"],
+            "bullets": [
+                "Best for: gifts and local crafts",
+                "Bargaining is common—keep it polite.",
+                "Ask the hotel for recommended stalls.",
+            ],
+        },
+    ]
 
 # -----------------------------
 # Super fast retrieval + caching
@@ -147,155 +155,608 @@ def cache_get(q: str) -> str | None:
     return obj["answer"]
 
 
-def cache_set(q: str, ans: str):
-    CACHE[q] = {"ts": time.time(), "answer": ans}
+def cache_set(q: str, ans: str, intent: str = ""):
+    CACHE[q] = {"ts": time.time(), "answer": ans, "intent": intent}
+
+
+CARD_SEP = "\x1f"  # joins a card's title and bullets into one string
+CARD_BLOCK = 1 << 16  # card ids are stored relative to their block, so they fit in 16 bits
+
+
+class Card:
+    """
+    Compiled knowledge card: title and bullets packed into one UTF-8 bytes
+    object (a str would widen to 2 bytes/char on the first ’ or –).
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, title: str, bullets: List[str]):
+        self.text = CARD_SEP.join([title] + bullets).encode("utf-8")
+
+    @classmethod
+    def from_text(cls, text: bytes) -> "Card":
+        card = cls.__new__(cls)
+        card.text = text
+        return card
+
+    @property
+    def title(self) -> str:
+        return self.text.decode("utf-8").partition(CARD_SEP)[0]
+
+    @property
+    def bullets(self) -> List[str]:
+        return self.text.decode("utf-8").split(CARD_SEP)[1:]
+
+
+class CardIndex:
+    """
+    Cards compiled once at load time. Every distinct token is interned and
+    given an int id. Cards are split into blocks of CARD_BLOCK; in a block
+    starting at card `base`, the cards containing token `tid` are
+    base + postings[offsets[tid]:offsets[tid + 1]], with postings an
+    array('H') of block-relative ids.
+    Scoring reuses one preallocated counts array, so a query touches only the
+    matching cards and allocates no per-card strings, lists or sets.
+    Not thread-safe: search() runs on the event loop (or a single Lambda
+    invocation).
+    """
+
+    __slots__ = ("cards", "token_ids", "blocks", "_counts", "_touched")
+
+    def __init__(self, cards: List[Dict[str, Any]]):
+        self.cards: List[Card] = []
+        self.token_ids: Dict[str, int] = {}
+        lists: List[List[int]] = []
+        for idx, card in enumerate(cards):
+            self.cards.append(Card(card["title"], card["bullets"]))
+            for text in [card["title"]] + card["tags"] + card["bullets"]:
+                for t in tokenize(text):
+                    tid = self.token_ids.get(t)
+                    if tid is None:
+                        tid = self.token_ids[sys.intern(t)] = len(lists)
+                        lists.append([])
+                    if not lists[tid] or lists[tid][-1] != idx:
+                        lists[tid].append(idx)
+
+        # (base, offsets, postings, memoryview of postings) per block
+        self.blocks: List[Tuple[int, array, array, memoryview]] = []
+        for base in range(0, len(self.cards), CARD_BLOCK):
+            end = base + CARD_BLOCK
+            offsets, postings = array("I", [0]), array("H")
+            for ids in lists:
+                lo, hi = bisect_left(ids, base), bisect_left(ids, end)
+                postings.extend([idx - base for idx in ids[lo:hi]])
+                offsets.append(len(postings))
+            self.blocks.append((base, offsets, postings, memoryview(postings)))
+        self._counts = array("I", bytes(4 * len(self.cards)))
+        self._touched = array("I")
+
+    def to_artifact(self) -> Dict[str, Any]:
+        """JSON-ready form of the compiled index (arrays as native-endian hex)."""
+        return {
+            "cards": [card.text.decode("utf-8") for card in self.cards],
+            "tokens": list(self.token_ids),  # in id order
+            "blocks": [[base, offsets.tobytes().hex(), postings.tobytes().hex()]
+                       for base, offsets, postings, _ in self.blocks],
+        }
+
+    @classmethod
+    def from_artifact(cls, data: Dict[str, Any]) -> "CardIndex":
+        """Load an index written by to_artifact() without tokenizing any card."""
+        index = cls.__new__(cls)
+        index.cards = [Card.from_text(text.encode("utf-8")) for text in data["cards"]]
+        index.token_ids = {sys.intern(t): tid for tid, t in enumerate(data["tokens"])}
+        index.blocks = []
+        for base, offsets_hex, postings_hex in data["blocks"]:
+            offsets, postings = array("I"), array("H")
+            offsets.frombytes(bytes.fromhex(offsets_hex))
+            postings.frombytes(bytes.fromhex(postings_hex))
+            index.blocks.append((base, offsets, postings, memoryview(postings)))
+        index._counts = array("I", bytes(4 * len(index.cards)))
+        index._touched = array("I")
+        return index
+
+    def search(self, query: str, k: int = 2) -> List[Card]:
+        # Score = number of query tokens (repeats included) found in the card;
+        # ties keep card order.
+        counts, touched = self._counts, self._touched
+        for t in tokenize(query):
+            tid = self.token_ids.get(t)
+            if tid is None:
+                continue
+            for base, offsets, _, view in self.blocks:
+                for rel in view[offsets[tid]:offsets[tid + 1]]:
+                    idx = base + rel
+                    if not counts[idx]:
+                        touched.append(idx)
+                    counts[idx] += 1
+        if not touched:
+            return []
+        best = heapq.nsmallest(k, touched, key=lambda idx: (-counts[idx], idx))
+        for idx in touched:
+            counts[idx] = 0
+        del touched[:]
+        return [self.cards[idx] for idx in best]
+
+
+# -----------------------------
+# Precompiled artifact (serverless cold start)
+# `python app.py --compile-artifact PATH` writes the compiled card index, the
+# menu views and the quick-question answers; with CONCIERGE_ARTIFACT=PATH they
+# are loaded instead of rebuilt.
+# -----------------------------
+_SOURCE_STAMP: str | None = None
+
+
+def source_stamp() -> str:
+    """
+    Cheap stamp of this module's source. The cards, menus and quick-path text
+    live here next to the code that renders them, so editing either changes it.
+    """
+    global _SOURCE_STAMP
+    if _SOURCE_STAMP is None:
+        import zlib  # hashlib costs ~4ms to import; a CRC is enough here
+
+        with open(__file__, "rb") as f:
+            src = f.read()
+        _SOURCE_STAMP = f"{zlib.crc32(src):08x}{len(src):x}"
+    return _SOURCE_STAMP
+
+
+def load_artifact(path: str) -> Dict[str, Any] | None:
+    """Read a compiled artifact (see compile_artifact); None if missing, stale or built from other source."""
+    if not path:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        warnings.warn(f"ignoring artifact {path}: {e}", RuntimeWarning)
+        return None
+    if data.get("version") != ARTIFACT_VERSION or data.get("byteorder") != sys.byteorder:
+        warnings.warn(f"ignoring artifact {path}: format {data.get('version')}/{data.get('byteorder')}"
+                      f" != {ARTIFACT_VERSION}/{sys.byteorder}", RuntimeWarning)
+        return None
+    if data.get("stamp") != source_stamp():
+        warnings.warn(f"ignoring artifact {path}: built from a different app.py; recompile it", RuntimeWarning)
+        return None
+    return data
+
+
+ARTIFACT = load_artifact(ARTIFACT_PATH)
 
+# Only the compiled index stays alive: the source dicts (or the artifact's
+# copy of the index) are dropped here.
+if ARTIFACT is not None:
+    CARD_INDEX = CardIndex.from_artifact(ARTIFACT.pop("index"))
+else:
+    CARD_INDEX = CardIndex(load_knowledge_cards())
 
-def retrieve_cards(query: str, k: int = 2) -> List[Dict[str, Any]]:
+
+def retrieve_cards(query: str, k: int = 2) -> List[Card]:
     """Return up to `k` matching knowledge cards (default 2)."""
-    q_tokens = tokenize(query)
-    if not q_tokens:
-        return []
+    return CARD_INDEX.search(query, k)
+
+
+# -----------------------------
+# Menus: structured items + precomputed filtered views
+# diet: "veg" / "non-veg", spice: "mild" / "spicy"
+# Only "24/7" items stay on the limited menu after 11:00 PM.
+# -----------------------------
+BREAKFAST_HOURS = "7:00 AM – 10:30 AM"
+DAY_HOURS = "until 11:00 PM"
+ALL_HOURS = "24/7"
+
+MENUS: Dict[str, Dict[str, Any]] = {
+    "breakfast": {
+        "intro": [
+            f"Breakfast ({BREAKFAST_HOURS})",
+            "- Served daily in the restaurant.",
+            "- Vegetarian options available. Please mention allergies.",
+        ],
+        "heading": "Breakfast Menu (Sample)",
+        "footer": "If you’re leaving early, Reception can arrange a packed breakfast on request.",
+        "late_menu": False,
+        "items": [
+            {"name": "Masala omelette", "category": "Hot Dishes", "diet": "non-veg", "spice": "spicy", "hours": BREAKFAST_HOURS},
+            {"name": "Plain omelette", "category": "Hot Dishes", "diet": "non-veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Pancakes with honey or maple syrup", "category": "Hot Dishes", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Idli & sambar", "category": "Hot Dishes", "diet": "veg", "spice": "spicy", "hours": BREAKFAST_HOURS},
+            {"name": "Poha (light & savory)", "category": "Hot Dishes", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Croissants, muffins, toast", "category": "Fresh Bakery", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Butter, jam, peanut butter", "category": "Fresh Bakery", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Seasonal fruit bowl", "category": "Healthy Corner", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Yogurt + granola", "category": "Healthy Corner", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Oats porridge (milk / water)", "category": "Healthy Corner", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Tea (assam / green), coffee", "category": "Beverages", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+            {"name": "Fresh juice (seasonal)", "category": "Beverages", "diet": "veg", "spice": "mild", "hours": BREAKFAST_HOURS},
+        ],
+    },
+    "room_service": {
+        "intro": [
+            "Room Service (In-room Dining)",
+            "- Hours: 24/7 (limited menu after 11:00 PM)",
+            "- To order: call Reception or use the in-room phone (Room Service)",
+            "- Typical delivery time: 25–45 minutes",
+            "- Please mention allergies or dietary preferences",
+        ],
+        "heading": "Room Service Menu (Popular picks)",
+        "footer": "Tell me what you want (veg/non-veg, spicy/mild, late night) and I’ll narrow the menu.",
+        "late_menu": True,
+        "items": [
+            {"name": "French fries", "category": "Snacks", "diet": "veg", "spice": "mild", "hours": ALL_HOURS},
+            {"name": "Veg sandwich", "category": "Snacks", "diet": "veg", "spice": "mild", "hours": ALL_HOURS},
+            {"name": "Chicken sandwich", "category": "Snacks", "diet": "non-veg", "spice": "mild", "hours": ALL_HOURS},
+            {"name": "Soup of the day", "category": "Snacks", "diet": "veg", "spice": "mild", "hours": ALL_HOURS},
+            {"name": "Butter paneer + naan", "category": "Mains", "diet": "veg", "spice": "mild", "hours": DAY_HOURS},
+            {"name": "Veg biryani", "category": "Mains", "diet": "veg", "spice": "spicy", "hours": DAY_HOURS},
+            {"name": "Chicken biryani", "category": "Mains", "diet": "non-veg", "spice": "spicy", "hours": DAY_HOURS},
+            {"name": "Pasta (white sauce)", "category": "Mains", "diet": "veg", "spice": "mild", "hours": DAY_HOURS},
+            {"name": "Pasta (red sauce)", "category": "Mains", "diet": "veg", "spice": "spicy", "hours": DAY_HOURS},
+            {"name": "Tea / Coffee", "category": "Drinks", "diet": "veg", "spice": "mild", "hours": ALL_HOURS},
+            {"name": "Soft drinks / Fresh juice", "category": "Drinks", "diet": "veg", "spice": "mild", "hours": ALL_HOURS},
+        ],
+    },
+}
+
+MenuKey = Tuple[str, Optional[str], Optional[str], bool]  # (menu, diet, spice, late)
+
+
+def render_menu(menu: str, diet: str | None = None, spice: str | None = None, late: bool = False) -> str:
+    spec = MENUS[menu]
+    sections: Dict[str, List[str]] = {}
+    for item in spec["items"]:
+        if diet and item["diet"] != diet:
+            continue
+        if spice and item["spice"] != spice:
+            continue
+        if late and item["hours"] != ALL_HOURS:
+            continue
+        sections.setdefault(item["category"], []).append(item["name"])
+
+    labels = [x for x in (diet, spice) if x] + (["after 11:00 PM"] if late else [])
+    heading = spec["heading"] + (f" – {', '.join(labels)}" if labels else "")
+
+    if sections:
+        body = "\n\n".join(
+            "\n".join([f"• {category}"] + [f"  - {name}" for name in names])
+            for category, names in sections.items()
+        )
+    else:
+        body = "- Nothing on this menu matches that request. Reception can check with the kitchen."
 
-    scored = []
-    for card in KNOWLEDGE_CARDS:
-        text = " ".join([card["title"]] + card["tags"] + card["bullets"])
-        tset = set(tokenize(text))
-        overlap = sum(1 for t in q_tokens if t in tset)
-        if overlap > 0:
-            scored.append((overlap, card))
+    return "\n".join(spec["intro"]) + "\n\n" + heading + "\n" + body + "\n\n" + spec["footer"]
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [c for _, c in scored[:k]]
+
+def build_menu_views() -> Dict[MenuKey, str]:
+    return {
+        (menu, diet, spice, late): render_menu(menu, diet, spice, late)
+        for menu, spec in MENUS.items()
+        for diet in (None, "veg", "non-veg")
+        for spice in (None, "mild", "spicy")
+        for late in ((False, True) if spec["late_menu"] else (False,))
+    }
+
+
+# token -> (filter slot, value). A negation earlier in the same clause flips
+# the next filter word ("I don't eat meat", "no spicy food"); "non" only
+# flips the word right after it ("non veg"). Negations toggle, so "no non-veg"
+# is veg. Clauses end at punctuation or "but".
+MENU_FILTER_WORDS: Dict[str, Tuple[str, Any]] = {
+    "veg": ("diet", "veg"),
+    "vegetarian": ("diet", "veg"),
+    "veggie": ("diet", "veg"),
+    "nonveg": ("diet", "non-veg"),
+    "chicken": ("diet", "non-veg"),
+    "meat": ("diet", "non-veg"),
+    "spicy": ("spice", "spicy"),
+    "spice": ("spice", "spicy"),
+    "mild": ("spice", "mild"),
+    "late": ("late", True),
+    "night": ("late", True),
+    "midnight": ("late", True),
+}
+# "don't" / "don’t" tokenize as "don" + "t"
+MENU_NEGATIONS = {"not", "no", "without", "nothing", "never", "dont", "don"}
+MENU_PREFIX_NEGATIONS = {"non"}
+MENU_CLAUSE_RE = re.compile(r"[,.;:!?]+|\bbut\b")
+MENU_NEGATED: Dict[Tuple[str, Any], Tuple[str, Any]] = {
+    ("diet", "veg"): ("diet", "non-veg"),
+    ("diet", "non-veg"): ("diet", "veg"),
+    ("spice", "spicy"): ("spice", "mild"),
+    ("spice", "mild"): ("spice", "spicy"),
+    ("late", True): ("late", False),
+}
+# Clock times on the limited late menu, 11 PM - 5:59 AM: "11 pm", "1am",
+# "12:30 am", "23:15", "after 11" (but not "after 11 am").
+MENU_LATE_TIME_RE = re.compile(
+    r"\b(?:11(?::[0-5]\d)?\s*pm|(?:12|[1-5])(?::[0-5]\d)?\s*am|(?:23|0[0-5]):[0-5]\d|after\s+11(?![:\d]*\s*am))\b"
+)
+
+
+def menu_filters(menu: str, query: str) -> MenuKey:
+    """Resolve the veg/spice/late-night filters in `query` to a MENU_VIEWS key."""
+    q_lower = query.lower()
+    found: Dict[str, Any] = {"diet": None, "spice": None, "late": MENU_LATE_TIME_RE.search(q_lower) is not None}
+    for clause in MENU_CLAUSE_RE.split(q_lower):
+        negated = prefix = False
+        for t in tokenize(clause):
+            hit = MENU_FILTER_WORDS.get(t)
+            if hit is not None:
+                if negated != prefix:
+                    hit = MENU_NEGATED.get(hit, hit)
+                found[hit[0]] = hit[1]
+                negated = prefix = False
+            elif t in MENU_NEGATIONS:
+                negated, prefix = not negated, False
+            elif t in MENU_PREFIX_NEGATIONS:
+                prefix = not prefix
+            else:
+                prefix = False
+    late = found["late"] and MENUS[menu]["late_menu"]
+    return (menu, found["diet"], found["spice"], late)
+
+
+def menu_view(menu: str, query: str = "") -> str:
+    return MENU_VIEWS[menu_filters(menu, query)]
 
 
 def build_breakfast_menu() -> str:
-    return (
-        "Breakfast (7:00 AM – 10:30 AM)\n"
-        "- Served daily in the restaurant.\n"
-        "- Vegetarian options available. Please mention allergies.\n\n"
-        "Breakfast Menu (Sample)\n"
-        "• Hot Dishes\n"
-        "  - Masala omelette / Plain omelette\n"
-        "  - Pancakes with honey or maple syrup\n"
-        "  - Idli & sambar\n"
-        "  - Poha (light & savory)\n\n"
-        "• Fresh Bakery\n"
-        "  - Croissants, muffins, toast\n"
-        "  - Butter, jam, peanut butter\n\n"
-        "• Healthy Corner\n"
-        "  - Seasonal fruit bowl\n"
-        "  - Yogurt + granola\n"
-        "  - Oats porridge (milk / water)\n\n"
-        "• Beverages\n"
-        "  - Tea (assam / green), coffee\n"
-        "  - Fresh juice (seasonal)\n\n"
-        "If you’re leaving early, Reception can arrange a packed breakfast on request."
-    )
+    return MENU_VIEWS[("breakfast", None, None, False)]
 
 
 def build_room_service_menu() -> str:
-    return (
-        "Room Service (In-room Dining)\n"
-        "- Hours: 24/7 (limited menu after 11:00 PM)\n"
-        "- To order: call Reception or use the in-room phone (Room Service)\n"
-        "- Typical delivery time: 25–45 minutes\n"
-        "- Please mention allergies or dietary preferences\n\n"
-        "Room Service Menu (Popular picks)\n"
-        "• Snacks\n"
-        "  - French fries\n"
-        "  - Veg sandwich / Chicken sandwich\n"
-        "  - Soup of the day\n\n"
-        "• Mains\n"
-        "  - Butter paneer + naan\n"
-        "  - Veg biryani / Chicken biryani\n"
-        "  - Pasta (white sauce / red sauce)\n\n"
-        "• Drinks\n"
-        "  - Tea / Coffee\n"
-        "  - Soft drinks / Fresh juice\n\n"
-        "Tell me what you want (veg/non-veg, spicy/mild) and I’ll suggest a few options."
-    )
+    return MENU_VIEWS[("room_service", None, None, False)]
+
+
+# Phrases the quick paths look for (also the fuzzy tier's extra vocabulary).
+CHECKIN_PHRASES = ("check-in", "checkin", "check in", "checkout", "check-out", "check out")
+BREAKFAST_PHRASES = ("breakfast",)
+ROOM_SERVICE_PHRASES = ("room service", "in-room", "in room", "order food", "dinner", "lunch")
+ATTRACTION_PHRASES = ("attraction", "attractions", "nearby", "near")
+AIRPORT_PHRASES = ("airport", "transfer", "pickup", "pick-up")
+WIFI_TOKENS = ("wifi", "wi-fi")
+
+# Fixed quick-path answers, by intent.
+QUICK_PATH_ANSWERS: Dict[str, str] = {
+    "checkin": (
+        "Check-in and Check-out\n"
+        "- Check-in time: 2:00 PM\n"
+        "- Check-out time: 11:00 AM\n"
+        "- Early check-in or late check-out is subject to availability.\n"
+        "- Luggage storage is available at Reception."
+    ),
+    "attractions": (
+        "Nearby Attractions\n"
+        "• Old Town Walk\n"
+        "  - Best for: evening strolls and street food\n"
+        "  - Ideal around sunset for the best atmosphere\n\n"
+        "• Riverfront Promenade\n"
+        "  - Best for: calm walks and sunset views\n"
+        "  - Less crowded earlier in the evening\n\n"
+        "• Local Handicraft Market\n"
+        "  - Best for: gifts and local crafts"
+    ),
+    "airport": (
+        "Airport Transfer\n"
+        "- Airport pickup and drop-off can be arranged through Reception.\n"
+        "- Please share your flight number and arrival or departure time.\n"
+        "- If you have large luggage, let Reception know in advance."
+    ),
+    "wifi": (
+        "Wi-Fi Access\n"
+        "- Connect to the network: MagicalPalace-Guest\n"
+        "- If a password is required, Reception will provide it (this may vary by booking).\n"
+        "- If your device doesn’t connect, try forgetting the network and reconnecting."
+    ),
+}
+
+MISS_ANSWER = (
+    "Sorry, I couldn't find that in the Magical Palace guide.\n\n"
+    "Try: 'breakfast menu', 'room service', 'wifi', 'check-out', 'spa booking', or 'nearby attractions'."
+)
 
+TIMEOUT_ANSWER = "Still looking — that took longer than expected. Please try again in a moment."
 
-def build_answer(query: str) -> str:
+
+def quick_answer(query: str) -> Tuple[str, str] | None:
+    """(answer, intent) from the keyword quick paths, or None."""
     q_lower = query.lower()
     q_tokens = set(tokenize(query))
 
     # Check-in / Check-out quick path
-    if any(x in q_lower for x in ("check-in", "checkin", "check in", "checkout", "check-out", "check out")):
-        return (
-            "Check-in and Check-out\n"
-            "- Check-in time: 2:00 PM\n"
-            "- Check-out time: 11:00 AM\n"
-            "- Early check-in or late check-out is subject to availability.\n"
-            "- Luggage storage is available at Reception."
-        )
+    if any(x in q_lower for x in CHECKIN_PHRASES):
+        return QUICK_PATH_ANSWERS["checkin"], "checkin"
 
     # Breakfast quick path (with menu)
-    if "breakfast" in q_lower:
-        return build_breakfast_menu()
+    if any(x in q_lower for x in BREAKFAST_PHRASES):
+        return menu_view("breakfast", query), "breakfast"
 
     # Room service quick path (with menu)
-    if any(x in q_lower for x in ("room service", "in-room", "in room", "order food", "dinner", "lunch")):
-        return build_room_service_menu()
+    if any(x in q_lower for x in ROOM_SERVICE_PHRASES):
+        return menu_view("room_service", query), "room_service"
 
     # Nearby attractions quick path
-    if any(x in q_lower for x in ("attraction", "attractions", "nearby", "near")):
-        return (
-            "Nearby Attractions\n"
-            "• Old Town Walk\n"
-            "  - Best for: evening strolls and street food\n"
-            "  - Ideal around sunset for the best atmosphere\n\n"
-            "• Riverfront Promenade\n"
-            "  - Best for: calm walks and sunset views\n"
-            "  - Less crowded earlier in the evening\n\n"
-            "• Local Handicraft Market\n"
-            "  - Best for: gifts and local crafts"
-        )
+    if any(x in q_lower for x in ATTRACTION_PHRASES):
+        return QUICK_PATH_ANSWERS["attractions"], "attractions"
 
     # Airport transfer quick path
-    if any(x in q_lower for x in ("airport", "transfer", "pickup", "pick-up")):
-        return (
-            "Airport Transfer\n"
-            "- Airport pickup and drop-off can be arranged through Reception.\n"
-            "- Please share your flight number and arrival or departure time.\n"
-            "- If you have large luggage, let Reception know in advance."
-        )
+    if any(x in q_lower for x in AIRPORT_PHRASES):
+        return QUICK_PATH_ANSWERS["airport"], "airport"
 
     # Wi-Fi quick path
-    if any(t in q_tokens for t in ("wifi", "wi-fi")):
-        return (
-            "Wi-Fi Access\n"
-            "- Connect to the network: MagicalPalace-Guest\n"
-            "- If a password is required, Reception will provide it (this may vary by booking).\n"
-            "- If your device doesn’t connect, try forgetting the network and reconnecting."
-        )
+    if any(t in q_tokens for t in WIFI_TOKENS):
+        return QUICK_PATH_ANSWERS["wifi"], "wifi"
 
-    # fallback behavior: up to 2 cards, concise formatting
-    cards = retrieve_cards(query, k=2)
+    return None
 
-    if not cards:
-        return (
-            "Sorry, I couldn't find that in the Magical Palace guide.\n\n"
-            "Try: 'breakfast menu', 'room service', 'wifi', 'check-out', 'spa booking', or 'nearby attractions'."
-        )
 
+def format_cards(cards: List[Card]) -> str:
+    """Concise answer from up to 2 cards."""
     if len(cards) == 1:
         c = cards[0]
-        bullets = [b.replace("\n", " ").strip() for b in c["bullets"]][:3]
-        lines = [f"{c['title']}"]
+        bullets = [b.replace("\n", " ").strip() for b in c.bullets][:3]
+        lines = [f"{c.title}"]
         for b in bullets:
             lines.append(f"- {b}")
         return "\n".join(lines)
 
     lines = ["Here are some helpful items:"]
     for c in cards:
-        first = c["bullets"][0].replace("\n", " ").strip()
-        lines.append(f"- {c['title']}: {first}")
+        first = c.bullets[0].replace("\n", " ").strip()
+        lines.append(f"- {c.title}: {first}")
 
     return "\n".join(lines)
 
 
+def answer_with_intent(query: str) -> Tuple[str, str]:
+    """Return (answer, intent); intent names the path that answered, "miss" if none."""
+    hit = quick_answer(query)
+    if hit is not None:
+        return hit
+
+    # fallback behavior: up to 2 cards, concise formatting
+    cards = retrieve_cards(query, k=2)
+    if not cards:
+        return MISS_ANSWER, "miss"
+    return format_cards(cards), "cards"
+
+
+def build_answer(query: str) -> str:
+    return answer_with_intent(query)[0]
+
+
+# -----------------------------
+# Tiered answer pipeline with a per-request latency budget
+# Tiers run cheapest first: exact cache -> quick-path intent -> indexed
+# retrieval -> fuzzy retrieval (expensive, opt-in). The first three cost well
+# under a millisecond and always run; the budget gates the fuzzy tier, which
+# also checks the deadline every FUZZY_CHECK_EVERY candidate words, so it
+# overruns by at most one such chunk.
+# -----------------------------
+ANSWER_BUDGET_MS = float(os.environ.get("CONCIERGE_BUDGET_MS", "50"))
+FUZZY_RETRIEVAL = os.environ.get("CONCIERGE_FUZZY", "") not in ("", "0")
+FUZZY_CUTOFF = 0.8
+FUZZY_CHECK_EVERY = 256
+
+_FUZZY_VOCAB: Dict[int, List[str]] | None = None
+
+
+def fuzzy_vocab() -> Dict[int, List[str]]:
+    """Vocabulary words grouped by length."""
+    global _FUZZY_VOCAB
+    if _FUZZY_VOCAB is None:
+        phrases = CHECKIN_PHRASES + BREAKFAST_PHRASES + ROOM_SERVICE_PHRASES + ATTRACTION_PHRASES + AIRPORT_PHRASES
+        words = set(CARD_INDEX.token_ids) | set(tokenize(" ".join(phrases + WIFI_TOKENS)))
+        _FUZZY_VOCAB = {}
+        for w in sorted(words):
+            _FUZZY_VOCAB.setdefault(len(w), []).append(w)
+    return _FUZZY_VOCAB
+
+
+def closest_word(word: str, deadline: float) -> str | None:
+    """
+    Most similar vocabulary word with difflib ratio >= FUZZY_CUTOFF (what
+    difflib.get_close_matches(n=1) finds), or the best so far at the deadline.
+    """
+    import difflib
+
+    # ratio = 2 * matches / (len(a) + len(b)) and matches <= the shorter
+    # length, so only words within this length range can reach the cutoff.
+    n = len(word)
+    lo = int(n * FUZZY_CUTOFF / (2 - FUZZY_CUTOFF))
+    hi = int(n * (2 - FUZZY_CUTOFF) / FUZZY_CUTOFF) + 1
+    vocab = fuzzy_vocab()
+    matcher = difflib.SequenceMatcher()
+    matcher.set_seq2(word)
+    best, best_score, checked = None, FUZZY_CUTOFF, 0
+    for size in range(lo, hi + 1):
+        for w in vocab.get(size, ()):
+            if checked % FUZZY_CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                return best
+            checked += 1
+            matcher.set_seq1(w)
+            if matcher.real_quick_ratio() >= best_score and matcher.quick_ratio() >= best_score:
+                score = matcher.ratio()
+                if score > best_score or (best is None and score == best_score):
+                    best, best_score = w, score
+    return best
+
+
+def correct_query(query: str, deadline: float) -> str | None:
+    """Replace unknown tokens with their closest vocabulary word; None if nothing changed."""
+    known = CARD_INDEX.token_ids
+    out, changed = [], False
+    for t in tokenize(query):
+        if t not in known and len(t) > 2 and time.perf_counter() < deadline:
+            close = closest_word(t, deadline)
+            if close is not None and close != t:
+                t, changed = close, True
+        out.append(t)
+    return " ".join(out) if changed else None
+
+
+def answer_query(msg: str, budget_ms: float | None = None) -> Dict[str, Any]:
+    """
+    Answer `msg` within `budget_ms` (default ANSWER_BUDGET_MS).
+
+    Returns {"answer", "intent", "tier", "elapsed_ms", "over_budget"}; tier is
+    the tier that answered ("cache", "quick", "index", "fuzzy") or "none".
+    When the budget runs out in the fuzzy tier without an answer, intent is
+    "timeout" and the answer is TIMEOUT_ANSWER (not a miss: the guide may
+    well have it).
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + (ANSWER_BUDGET_MS if budget_ms is None else budget_ms) / 1000
+    key = msg.lower()
+
+    def done(answer: str, intent: str, tier: str) -> Dict[str, Any]:
+        now = time.perf_counter()
+        over = now > deadline
+        # A timeout may be answerable next time; don't pin it in the cache.
+        if tier != "cache" and intent != "timeout":
+            cache_set(key, answer, intent)
+        return {"answer": answer, "intent": intent, "tier": tier,
+                "elapsed_ms": round((now - t0) * 1000, 3), "over_budget": over}
+
+    # Tier 0: exact cache (precompiled artifact answers, then the TTL cache)
+    pre = PRECOMPUTED_ANSWERS.get(key)
+    if pre is not None:
+        return done(pre[0], pre[1], "cache")
+    cached = cache_get(key)
+    if cached is not None:
+        return done(cached, CACHE[key]["intent"], "cache")
+
+    # Tier 1: quick-path intent
+    hit = quick_answer(msg)
+    if hit is not None:
+        return done(hit[0], hit[1], "quick")
+
+    # Tier 2: indexed retrieval (cheap, so it runs even when the budget is spent)
+    cards = retrieve_cards(msg, k=2)
+    if cards:
+        return done(format_cards(cards), "cards", "index")
+    if not FUZZY_RETRIEVAL:
+        return done(MISS_ANSWER, "miss", "none")
+    if time.perf_counter() > deadline:
+        return done(TIMEOUT_ANSWER, "timeout", "none")
+
+    # Tier 3: fuzzy retrieval (typo-tolerant), stops correcting at the deadline
+    corrected = correct_query(msg, deadline)
+    if corrected is not None:
+        hit = quick_answer(corrected)
+        if hit is not None:
+            return done(hit[0], hit[1], "fuzzy")
+        cards = retrieve_cards(corrected, k=2)
+        if cards:
+            return done(format_cards(cards), "cards", "fuzzy")
+    # Corrections stop at the deadline, so a late miss is only a timeout.
+    if time.perf_counter() > deadline:
+        return done(TIMEOUT_ANSWER, "timeout", "none")
+    return done(MISS_ANSWER, "miss", "none")
+
+
 # -----------------------------
 # Website UI (HTML + CSS + JS)
 # Eye-catchy, modern glassy look
@@ -712,6 +1173,94 @@ HTML_PAGE = r"""
 
     addBubble("Welcome to Magical Palace ✨\n\nAsk me about hotel services, policies, room service, or nearby attractions.", "bot");
 
+    // Client-side answer store. Answers are the same for every guest, so the
+    // quick-help answers are prefetched once (one request, revalidated by
+    // ETag) and pinned; other /chat answers that carry a "version" (never
+    // misses or timeouts) are learned, oldest evicted first. Nothing is served
+    // locally until the server has confirmed the store's version on this page
+    // load (prefetch 304/200, or a /chat answer with the same version). A
+    // /chat version that differs means the server's answers changed: stop
+    // serving the store and prefetch again.
+    const STORE_KEY = "mp-answers";
+    const STORE_LIMIT = 100;  // learned answers; pinned ones don't count
+    const hasOwn = (obj, key) => Object.prototype.hasOwnProperty.call(obj, key);
+    let answerStore = loadStore();
+    let storeConfirmed = false;
+    let pendingPrefetch = null;
+
+    function dict(obj){
+      // No prototype, so "constructor" or "__proto__" are ordinary keys.
+      return Object.assign(Object.create(null), obj || {});
+    }
+
+    function loadStore(){
+      try{
+        const s = JSON.parse(localStorage.getItem(STORE_KEY) || "null");
+        if(s && s.version && s.pinned && s.learned){
+          return {version: s.version, pinned: dict(s.pinned), learned: dict(s.learned)};
+        }
+      }catch(e){}
+      return {version: "", pinned: dict(), learned: dict()};
+    }
+
+    function saveStore(){
+      try{ localStorage.setItem(STORE_KEY, JSON.stringify(answerStore)); }catch(e){}
+    }
+
+    function answerKey(q){
+      return q.trim().toLowerCase();
+    }
+
+    function storedAnswer(key){
+      if(!storeConfirmed) return undefined;
+      if(hasOwn(answerStore.pinned, key)) return answerStore.pinned[key];
+      if(hasOwn(answerStore.learned, key)) return answerStore.learned[key];
+      return undefined;
+    }
+
+    // One prefetch at a time; callers share the pending one.
+    function prefetchAnswers(){
+      if(pendingPrefetch) return pendingPrefetch;
+      const p = (async () => {
+        try{
+          const headers = answerStore.version ? {"If-None-Match": '"' + answerStore.version + '"'} : {};
+          const resp = await fetch("/chat/prefetch", {headers});
+          if(resp.status === 304){
+            storeConfirmed = true;
+            return;
+          }
+          if(!resp.ok) return;
+          const json = await resp.json();
+          answerStore = {version: json.version, pinned: dict(json.answers), learned: dict()};
+          storeConfirmed = true;
+          saveStore();
+        }catch(e){}
+      })();
+      pendingPrefetch = p;
+      p.then(() => { if(pendingPrefetch === p) pendingPrefetch = null; });
+      return p;
+    }
+
+    function rememberAnswer(key, answer, version){
+      if(!answer || !version) return;
+      if(version !== answerStore.version){
+        storeConfirmed = false;
+        if(!pendingPrefetch) prefetchAnswers();
+        return;
+      }
+      storeConfirmed = true;
+      if(hasOwn(answerStore.pinned, key)) return;
+      const learned = answerStore.learned;
+      if(!hasOwn(learned, key)){
+        const keys = Object.keys(learned);
+        if(keys.length >= STORE_LIMIT) delete learned[keys[0]];
+      }
+      learned[key] = answer;
+      saveStore();
+    }
+
+    prefetchAnswers();
+
     inputEl.addEventListener("keydown", (e) => {
       if(e.key === "Enter") send();
     });
@@ -728,6 +1277,14 @@ HTML_PAGE = r"""
       inputEl.value = "";
       addBubble(q, "user");
 
+      const key = answerKey(q);
+      if(pendingPrefetch) await pendingPrefetch;
+      const local = storedAnswer(key);
+      if(local !== undefined){
+        addBubble(local, "bot");
+        return;
+      }
+
       sendBtn.disabled = true;
 
       const botBubble = addBubble("Typing…", "bot");
@@ -742,6 +1299,7 @@ HTML_PAGE = r"""
 
         const json = await resp.json();
         botBubble.textContent = (json.answer || "No answer.");
+        rememberAnswer(key, json.answer, json.version);
       }catch(e){
         botBubble.textContent = "Server error. Make sure the app is running.";
       }
@@ -754,45 +1312,391 @@ HTML_PAGE = r"""
 """
 
 
-@app.get("/", response_class=HTMLResponse)
-def home():
-    return HTML_PAGE
+# -----------------------------
+# Artifact-backed answer data
+# -----------------------------
+# Questions behind the UI's quick-help buttons and chips.
+QUICK_QUERIES = [
+    "What time is check-in and check-out?",
+    "Show breakfast menu",
+    "How do I get Wi-Fi?",
+    "Show room service menu",
+    "Suggest nearby attractions",
+    "How do I book an airport transfer?",
+    "Breakfast menu",
+    "Room service menu",
+    "Wi-Fi help",
+    "Nearby attractions",
+]
 
+# Every (diet, spice, late) combination is rendered once at load time (or read
+# from the compiled artifact); answering a menu question is then a dict lookup.
+if ARTIFACT is not None:
+    MENU_VIEWS: Dict[MenuKey, str] = {
+        (menu, diet, spice, late): text for menu, diet, spice, late, text in ARTIFACT.pop("menu_views")
+    }
+else:
+    MENU_VIEWS = build_menu_views()
+
+# normalized question -> [answer, intent], served by the exact-cache tier
+PRECOMPUTED_ANSWERS: Dict[str, List[str]] = ARTIFACT.pop("answers") if ARTIFACT is not None else {}
+
+
+# Bump to invalidate every client-side answer store without changing content.
+ANSWERS_SALT = os.environ.get("CONCIERGE_ANSWERS_VERSION", "")
+# Questions that walk the other answer paths (card formatting, menu filters);
+# their answers are part of the client version.
+VERSION_PROBES = [
+    "spa booking",
+    "pool and gym hours",
+    "veg room service",
+    "no chicken, spicy dinner after 11 pm",
+    "mild veg breakfast",
+]
+_QUICK_ANSWERS: Dict[str, Any] | None = None
+
+
+def quick_answers() -> Dict[str, Any]:
+    """
+    {"version", "answers"} for the UI prefetch. The version (also the ETag)
+    covers what stored answers depend on: source_stamp() (the answer data and
+    the code that formats it), ARTIFACT_VERSION, the fuzzy-tier switch, and
+    the answers to QUICK_QUERIES + VERSION_PROBES as served. So any deploy
+    that changes an answer invalidates every answer the page has stored.
+    """
+    global _QUICK_ANSWERS
+    if _QUICK_ANSWERS is None:
+        import hashlib
+
+        answers = {q.lower(): answer_query(q, budget_ms=float("inf"))["answer"] for q in QUICK_QUERIES}
+        probes = [answer_query(q, budget_ms=float("inf"))["answer"] for q in VERSION_PROBES]
+        build = [ANSWERS_SALT, ARTIFACT_VERSION, source_stamp(), FUZZY_RETRIEVAL]
+        blob = json.dumps([build, answers, probes], sort_keys=True).encode("utf-8")
+        _QUICK_ANSWERS = {"version": hashlib.sha1(blob).hexdigest()[:16], "answers": answers}
+    return _QUICK_ANSWERS
+
+
+def chat_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON body for /chat. Only answers the page may store carry a version."""
+    body = {"answer": result["answer"], "tier": result["tier"], "elapsed_ms": result["elapsed_ms"],
+            "over_budget": result["over_budget"]}
+    # Misses and timeouts stay off the client so repeats reach the server
+    # (and the query log).
+    if result["intent"] not in ("miss", "timeout"):
+        body["version"] = quick_answers()["version"]
+    return body
+
+
+EMPTY_MESSAGE_ANSWER = "Please type a question."
+
+
+def payload_message(payload: Any) -> str:
+    """The request body's "message", stripped; "" if missing or not a string."""
+    msg = payload.get("message") if isinstance(payload, dict) else None
+    return msg.strip() if isinstance(msg, str) else ""
+
+
+def empty_chat_response() -> Dict[str, Any]:
+    """/chat body for a blank message; it skips answer_query, the cache and the query log."""
+    return {"answer": EMPTY_MESSAGE_ANSWER, "tier": "none", "elapsed_ms": 0.0, "over_budget": False}
+
+
+def compile_artifact(path: str) -> None:
+    """Write the card index, menu views and quick-question answers so cold starts can skip building them."""
+    data = {
+        "version": ARTIFACT_VERSION,
+        "stamp": source_stamp(),
+        "byteorder": sys.byteorder,
+        "index": CardIndex(load_knowledge_cards()).to_artifact(),
+        "menu_views": [[*key, text] for key, text in build_menu_views().items()],
+        "answers": {q.lower(): list(answer_with_intent(q)) for q in QUICK_QUERIES},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
 
-@app.post("/chat/stream")
-async def chat_stream(payload: Dict[str, Any]):
-    msg = (payload.get("message") or "").strip()
-    if not msg:
-        async def empty_gen():
-            yield "data: Please type a question.\n\n"
-            yield "data: [DONE]\n\n"
-        return EventSourceResponse(empty_gen())
 
-    key = msg.lower()
-    cached = cache_get(key)
-    if cached is not None:
-        async def cached_gen():
-            yield f"data: {cached}\n\n"
+def sse_chunks(answer: str, chunk: int = 80) -> List[str]:
+    pieces = []
+    for i in range(0, len(answer), chunk):
+        piece = answer[i:i+chunk]
+        piece = piece.replace("\r", "")
+        piece = piece.replace("\n", "\n" + "data: ")
+        pieces.append(f"data: {piece}\n\n")
+    return pieces
+
+
+# -----------------------------
+# Query log (append-only JSONL, batched off the request path)
+# record() only appends a tuple to a bounded ring buffer; a background task
+# drains it in batches and writes them in a worker thread. When the buffer
+# is full the oldest record is overwritten and counted as dropped.
+# -----------------------------
+QUERY_LOG_PATH = os.environ.get("CONCIERGE_QUERY_LOG", "query_log.jsonl")  # "" disables
+QUERY_LOG_BUFFER = 10_000
+QUERY_LOG_BATCH = 1_000
+QUERY_LOG_FLUSH_SECS = 1.0
+QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+QUERY_LOG_BACKUPS = 5
+
+
+class QueryLog:
+    def __init__(self, path: str, maxlen: int = QUERY_LOG_BUFFER, max_bytes: int = QUERY_LOG_MAX_BYTES,
+                 backups: int = QUERY_LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer: Deque[Tuple[Any, ...]] = deque(maxlen=maxlen)
+        self.dropped = 0
+        self.written = 0
+        self._dropped_logged = 0
+        self._write_lock = threading.Lock()  # one writer (and rotation) at a time
+        self._stop: Any = None  # asyncio.Event while run() is active
+
+    def record(self, query: str, key: str, result: Dict[str, Any]) -> None:
+        """Log one answer_query() result."""
+        if not self.path:
+            return
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append((time.time(), query, key, result["intent"], result["tier"],
+                            result["elapsed_ms"], result["over_budget"]))
+
+    def drain(self, limit: int = QUERY_LOG_BATCH) -> List[Tuple[Any, ...]]:
+        batch = []
+        while self.buffer and len(batch) < limit:
+            batch.append(self.buffer.popleft())
+        return batch
+
+    def write_batch(self, batch: List[Tuple[Any, ...]], dropped: int = 0) -> None:
+        lines = [
+            json.dumps({"ts": round(ts, 3), "query": query, "key": key, "intent": intent, "tier": tier,
+                        "cache_hit": tier == "cache", "latency_ms": latency_ms, "over_budget": over_budget},
+                       ensure_ascii=False)
+            for ts, query, key, intent, tier, latency_ms, over_budget in batch
+        ]
+        if dropped:
+            lines.append(json.dumps({"ts": round(time.time(), 3), "dropped": dropped}))
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        with self._write_lock:
+            self._rotate_if_needed(len(data))
+            with open(self.path, "ab") as f:
+                f.write(data)
+            self.written += len(batch)
+
+    def _rotate_if_needed(self, incoming: int) -> None:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size == 0 or size + incoming <= self.max_bytes:
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    async def flush(self) -> None:
+        import asyncio
+
+        while True:
+            batch = self.drain()
+            dropped = self.dropped - self._dropped_logged
+            self._dropped_logged = self.dropped
+            if not batch and not dropped:
+                return
+            await asyncio.to_thread(self.write_batch, batch, dropped)
+
+    async def run(self, interval: float = QUERY_LOG_FLUSH_SECS) -> None:
+        """Flush every `interval` seconds until stop(); the last pass drains the buffer."""
+        import asyncio
+
+        self._stop = asyncio.Event()
+        while True:
+            stopping = self._stop.is_set()
+            if not stopping:
+                try:
+                    await asyncio.wait_for(self._stop.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                await self.flush()
+            except OSError:
+                pass  # keep serving; a batch that failed to write is lost
+            if stopping:
+                return
+
+    def stop(self) -> None:
+        # Cancelling run() would not stop a write already running in a worker
+        # thread, so it is asked to finish instead.
+        if self._stop is not None:
+            self._stop.set()
+
+
+QUERY_LOG = QueryLog(QUERY_LOG_PATH)
+
+
+# -----------------------------
+# Web app (FastAPI), built on first access to `app.app`
+# -----------------------------
+def create_app():
+    from contextlib import asynccontextmanager
+
+    from fastapi import FastAPI, Request
+    from fastapi.responses import HTMLResponse, JSONResponse, Response
+    from fastapi.middleware.cors import CORSMiddleware
+
+    @asynccontextmanager
+    async def lifespan(_):
+        import asyncio
+
+        flusher = asyncio.create_task(QUERY_LOG.run())
+        try:
+            yield
+        finally:
+            QUERY_LOG.stop()
+            await flusher  # finishes its in-flight write, then drains the buffer
+
+    web = FastAPI(title="Magical Palace Concierge", lifespan=lifespan)
+
+    web.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # ok for local demo
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @web.get("/", response_class=HTMLResponse)
+    def home():
+        return HTML_PAGE
+
+    # async so it runs on the event loop: answer_query() and CardIndex.search()
+    # are not thread-safe, and a sync route would run in the threadpool.
+    @web.get("/chat/prefetch")
+    async def chat_prefetch(request: Request):
+        data = quick_answers()
+        etag = '"' + data["version"] + '"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(data, headers=headers)
+
+    @web.post("/chat/stream")
+    async def chat_stream(payload: Dict[str, Any]):
+        import asyncio
+        from sse_starlette.sse import EventSourceResponse
+
+        msg = payload_message(payload)
+        if not msg:
+            async def empty_gen():
+                yield f"data: {EMPTY_MESSAGE_ANSWER}\n\n"
+                yield "data: [DONE]\n\n"
+            return EventSourceResponse(empty_gen())
+
+        result = answer_query(msg)
+        QUERY_LOG.record(msg, msg.lower(), result)
+        answer = result["answer"]
+        headers = {"X-Answer-Tier": result["tier"], "X-Elapsed-Ms": str(result["elapsed_ms"])}
+
+        if result["tier"] == "cache":
+            async def cached_gen():
+                yield f"data: {answer}\n\n"
+                yield "data: [DONE]\n\n"
+            return EventSourceResponse(cached_gen(), headers=headers)
+
+        async def gen():
+            for piece in sse_chunks(answer):
+                yield piece
+                await asyncio.sleep(0.02)
             yield "data: [DONE]\n\n"
-        return EventSourceResponse(cached_gen())
 
-    answer = build_answer(msg)
-    cache_set(key, answer)
+        return EventSourceResponse(gen(), headers=headers)
+
+    @web.post("/chat")
+    async def chat(payload: Dict[str, Any]):
+        msg = payload_message(payload)
+        if not msg:
+            return empty_chat_response()
+        result = answer_query(msg)
+        QUERY_LOG.record(msg, msg.lower(), result)
+        return chat_response(result)
+
+    return web
+
 
-    async def gen():
-        chunk = 80
-        for i in range(0, len(answer), chunk):
-            piece = answer[i:i+chunk]
-            piece = piece.replace("\r", "")
-            piece = piece.replace("\n", "\n" + "data: ")
-            yield f"data: {piece}\n\n"
-            await asyncio.sleep(0.02)
-        yield "data: [DONE]\n\n"
+def __getattr__(name: str):
+    # `uvicorn app:app` resolves the ASGI app through here (PEP 562).
+    if name == "app":
+        web = create_app()
+        globals()["app"] = web
+        return web
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    return EventSourceResponse(gen())
+
+# -----------------------------
+# Serverless entry point (AWS Lambda / API Gateway, payload v1 or v2)
+# -----------------------------
+def _http_response(status: int, body: str, content_type: str, **headers: str) -> Dict[str, Any]:
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": content_type, "Access-Control-Allow-Origin": "*", **headers},
+        "body": body,
+    }
 
 
-@app.post("/chat")
-async def chat(payload: Dict[str, Any]):
-    msg = (payload.get("message") or "").strip()
-    return {"answer": build_answer(msg)}
+def lambda_handler(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    http = (event.get("requestContext") or {}).get("http") or {}
+    method = (event.get("httpMethod") or http.get("method") or "GET").upper()
+    path = event.get("rawPath") or event.get("path") or "/"
+
+    if method == "GET" and path == "/":
+        return _http_response(200, HTML_PAGE, "text/html; charset=utf-8")
+
+    if method == "GET" and path == "/chat/prefetch":
+        data = quick_answers()
+        etag = '"' + data["version"] + '"'
+        request_headers = {k.lower(): v for k, v in (event.get("headers") or {}).items()}
+        if request_headers.get("if-none-match") == etag:
+            return _http_response(304, "", "application/json", ETag=etag)
+        return _http_response(200, json.dumps(data), "application/json", ETag=etag)
+
+    if method != "POST" or path not in ("/chat", "/chat/stream"):
+        return _http_response(404, json.dumps({"detail": "Not Found"}), "application/json")
+
+    body = event.get("body") or ""
+    if event.get("isBase64Encoded"):
+        import base64
+
+        body = base64.b64decode(body).decode("utf-8")
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        payload = {}
+    msg = payload_message(payload)
+
+    if path == "/chat/stream":
+        # Lambda buffers the response, so the SSE frames are sent in one body.
+        frames = sse_chunks(answer_query(msg)["answer"]) if msg else [f"data: {EMPTY_MESSAGE_ANSWER}\n\n"]
+        return _http_response(200, "".join(frames) + "data: [DONE]\n\n", "text/event-stream")
+
+    body = chat_response(answer_query(msg)) if msg else empty_chat_response()
+    return _http_response(200, json.dumps(body), "application/json")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Magical Palace Concierge utilities")
+    parser.add_argument("--compile-artifact", metavar="PATH", help="write the precompiled cold-start artifact")
+    args = parser.parse_args()
+    if args.compile_artifact:
+        compile_artifact(args.compile_artifact)
+        print(f"wrote {args.compile_artifact}")
+    else:
+        parser.print_help()
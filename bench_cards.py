@@ -0,0 +1,113 @@
+"""
+Card retrieval benchmark: dict cards scanned per query (the original
+retrieve_cards) vs the compiled CardIndex.
+
+Reports, for N synthetic cards:
+  - memory retained by each layout (tracemalloc): the old app kept the dict
+    cards; the app now compiles them into CardIndex and drops them
+  - peak transient allocation per query (tracemalloc)
+  - mean query latency
+
+Usage:
+  python bench_cards.py                 # 100k cards
+  python bench_cards.py --cards 20000 --queries 50
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from app import CardIndex, load_knowledge_cards, tokenize
+
+
+def legacy_retrieve(cards: List[Dict[str, Any]], query: str, k: int = 2) -> List[Dict[str, Any]]:
+    q_tokens = tokenize(query)
+    if not q_tokens:
+        return []
+    scored = []
+    for card in cards:
+        text = " ".join([card["title"]] + card["tags"] + card["bullets"])
+        tset = set(tokenize(text))
+        overlap = sum(1 for t in q_tokens if t in tset)
+        if overlap > 0:
+            scored.append((overlap, card))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [c for _, c in scored[:k]]
+
+
+def synthetic_cards(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    words = [f"w{i}" for i in range(20_000)]
+    templates = load_knowledge_cards()
+    cards = []
+    for i in range(n):
+        base = templates[i % len(templates)]
+        extra = rng.sample(words, 6)
+        cards.append({
+            "title": f"{base['title']} {i}",
+            "tags": base["tags"] + extra[:3],
+            "bullets": [f"{b} {w}" for b, w in zip(base["bullets"], extra[3:])] + base["bullets"][3:],
+        })
+    return cards
+
+
+def retained(build):
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def per_query(fn, queries):
+    """Mean latency, and the largest transient allocation peak of any single query."""
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(q)
+    elapsed = (time.perf_counter() - t0) / len(queries)
+
+    peak = 0
+    tracemalloc.start()
+    for q in queries:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn(q)
+        _, q_peak = tracemalloc.get_traced_memory()
+        peak = max(peak, q_peak - base)
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed + 1)
+    queries = [rng.choice(["spa booking", "pool hours", "airport pickup w12", "sunset walk", "wifi password",
+                           "w42 w77 market", "late checkout"]) for _ in range(args.queries)]
+
+    # Same load path as app.py: CARD_INDEX = CardIndex(load_knowledge_cards()),
+    # after which the source dicts are garbage.
+    cards, dict_bytes = retained(lambda: synthetic_cards(args.cards, random.Random(args.seed)))
+    index, index_bytes = retained(lambda: CardIndex(synthetic_cards(args.cards, random.Random(args.seed))))
+
+    for q in queries:
+        got = [c.title for c in index.search(q)]
+        want = [c["title"] for c in legacy_retrieve(cards, q)]
+        assert got == want, (q, got, want)
+
+    legacy_s, legacy_peak = per_query(lambda q: legacy_retrieve(cards, q), queries)
+    index_s, index_peak = per_query(lambda q: index.search(q), queries)
+
+    print(f"{args.cards} cards, {args.queries} queries (results identical)")
+    print(f"{'':<22}{'dict cards':>14}{'CardIndex':>14}  (CardIndex: cards + search index, no dicts)")
+    print(f"{'retained memory':<22}{dict_bytes / 2**20:>12.1f}MB{index_bytes / 2**20:>12.1f}MB")
+    print(f"{'peak memory / query':<22}{legacy_peak / 1024:>12.1f}KB{index_peak / 1024:>12.1f}KB")
+    print(f"{'latency / query':<22}{legacy_s * 1000:>12.2f}ms{index_s * 1000:>12.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
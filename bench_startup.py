@@ -0,0 +1,98 @@
+"""
+Cold-start benchmark for the serverless entry point.
+
+Runs fresh interpreters and reports:
+  - a `python -X importtime` breakdown of `import app` (slowest modules first)
+  - time to first response: interpreter start -> lambda_handler() answer
+
+Usage:
+  python bench_startup.py                 # plain import
+  python bench_startup.py --artifact      # with a freshly compiled artifact
+  python bench_startup.py --max-ms 150    # exit 1 if first response is slower
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+FIRST_RESPONSE = (
+    "import app\n"
+    "app.lambda_handler({'httpMethod': 'POST', 'path': '/chat', "
+    "'body': '{\"message\": \"Show room service menu\"}'})\n"
+    "import sys\n"
+    "print(int('fastapi' in sys.modules))\n"
+)
+
+
+def run(args, env):
+    return subprocess.run([sys.executable] + args, cwd=HERE, env=env, capture_output=True, text=True, check=True)
+
+
+def importtime_breakdown(env, top):
+    proc = run(["-X", "importtime", "-c", "import app"], env)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cum_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cum_us, self_us, name in rows[:top]:
+        print(f"{cum_us / 1000:>10.2f}ms {self_us / 1000:>8.2f}ms  {name}")
+
+
+def first_response_ms(env, runs):
+    samples = []
+    fastapi_loaded = False
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = run(["-c", FIRST_RESPONSE], env)
+        samples.append((time.perf_counter() - t0) * 1000)
+        fastapi_loaded |= proc.stdout.strip() == "1"
+    return samples, fastapi_loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact", action="store_true", help="compile and load CONCIERGE_ARTIFACT")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if median first response exceeds this")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("CONCIERGE_ARTIFACT", None)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.artifact:
+            path = os.path.join(tmp, "concierge_artifact.json")
+            run(["app.py", "--compile-artifact", path], env)
+            env["CONCIERGE_ARTIFACT"] = path
+
+        print("== import app (python -X importtime) ==")
+        importtime_breakdown(env, args.top)
+
+        samples, fastapi_loaded = first_response_ms(env, args.runs)
+
+    median = statistics.median(samples)
+    print()
+    print(f"== time to first response ({args.runs} cold interpreters) ==")
+    print(f"median {median:.1f}ms  min {min(samples):.1f}ms  max {max(samples):.1f}ms")
+    print(f"fastapi imported on serverless path: {'yes' if fastapi_loaded else 'no'}")
+
+    if fastapi_loaded:
+        print("FAIL: serverless path imported fastapi")
+        return 1
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: median {median:.1f}ms > budget {args.max_ms:.1f}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Offline miss analysis for the concierge query log.
+
+Streams the JSONL written by app.QueryLog (current file plus rotated
+backups) line by line and prints the most frequent missed queries, intent
+frequencies, answering tiers, cache hit rate, latency, over-budget and
+dropped-record totals. Only the
+aggregates are kept in memory, never a whole file.
+
+Usage:
+  python querylog_report.py                      # query_log.jsonl + .1 .. .N
+  python querylog_report.py logs/*.jsonl* --top 50
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import Counter
+from typing import Dict, Iterator, List
+
+
+def iter_records(paths: List[str]) -> Iterator[Dict]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn write at the tail of a file
+
+
+def default_paths() -> List[str]:
+    """Oldest first: base.N, ..., base.1, base."""
+    base = os.environ.get("CONCIERGE_QUERY_LOG") or "query_log.jsonl"
+    backups = [p for p in glob.glob(glob.escape(base) + ".*") if p.rsplit(".", 1)[1].isdigit()]
+    backups.sort(key=lambda p: int(p.rsplit(".", 1)[1]), reverse=True)
+    return backups + ([base] if os.path.exists(base) else [])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="log files (default: CONCIERGE_QUERY_LOG and its backups)")
+    parser.add_argument("--top", type=int, default=20, help="how many missed queries to list")
+    args = parser.parse_args()
+
+    paths = args.paths or default_paths()
+    if not paths:
+        print("no query log files found", file=sys.stderr)
+        return 1
+
+    intents: Counter = Counter()
+    tiers: Counter = Counter()
+    misses: Counter = Counter()
+    miss_example: Dict[str, str] = {}
+    total = cache_hits = over_budget = dropped = 0
+    latency_sum = latency_max = 0.0
+
+    for rec in iter_records(paths):
+        if "dropped" in rec:
+            dropped += rec["dropped"]
+            continue
+        total += 1
+        intent = rec.get("intent") or "unknown"
+        intents[intent] += 1
+        tiers[rec.get("tier") or "unknown"] += 1
+        cache_hits += bool(rec.get("cache_hit"))
+        over_budget += bool(rec.get("over_budget"))
+        latency = float(rec.get("latency_ms") or 0.0)
+        latency_sum += latency
+        latency_max = max(latency_max, latency)
+        # "timeout" is a budget cut, not a gap in the guide; the tier and
+        # intent tables count those.
+        if intent == "miss" and not rec.get("over_budget"):
+            key = " ".join((rec.get("key") or "").split())
+            if key:  # blank submissions (only in logs from before /chat skipped them)
+                misses[key] += 1
+                miss_example.setdefault(key, rec.get("query") or key)
+
+    print(f"files: {len(paths)}  records: {total}  dropped: {dropped}")
+    if not total:
+        return 0
+    print(f"cache hit rate: {cache_hits / total:.1%}  "
+          f"latency mean {latency_sum / total:.3f}ms  max {latency_max:.3f}ms  "
+          f"over budget: {over_budget} ({over_budget / total:.1%})")
+
+    print("\nanswering tier")
+    for tier, n in tiers.most_common():
+        print(f"{n:>8}  {n / total:>6.1%}  {tier}")
+
+    print("\nintent frequencies")
+    for intent, n in intents.most_common():
+        print(f"{n:>8}  {n / total:>6.1%}  {intent}")
+
+    print(f"\ntop {args.top} missed queries ({sum(misses.values())} misses, {len(misses)} distinct)")
+    for key, n in misses.most_common(args.top):
+        print(f"{n:>8}  {miss_example[key]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import pytest
+
+from app import menu_filters
+
+
+# Guest phrasing -> expected (diet, spice, late) on the room service menu.
+@pytest.mark.parametrize("phrase, expected", [
+    ("veg room service", ("veg", None, False)),
+    ("non veg room service", ("non-veg", None, False)),
+    ("no meat room service", ("veg", None, False)),
+    ("no chicken dinner", ("veg", None, False)),
+    ("I don't eat meat, room service", ("veg", None, False)),
+    ("I dont want chicken for dinner", ("veg", None, False)),
+    ("never anything spicy at dinner", (None, "mild", False)),
+    ("no non-veg room service", ("veg", None, False)),
+    ("not non veg dinner", ("veg", None, False)),
+    ("no, that veg dinner please", ("veg", None, False)),
+    ("nothing spicy but veg please", ("veg", "mild", False)),
+    ("spicy dinner", (None, "spicy", False)),
+    ("room service not too spicy", (None, "mild", False)),
+    ("not very mild dinner", (None, "spicy", False)),
+    ("late night non-veg room service", ("non-veg", None, True)),
+    ("veg dinner, no spice", ("veg", "mild", False)),
+    ("room service after 11 pm", (None, None, True)),
+    ("room service at 1 am", (None, None, True)),
+    ("room service after 11", (None, None, True)),
+    ("dinner at 11:30pm", (None, None, True)),
+    ("dinner at 23:15", (None, None, True)),
+    ("lunch at 1 pm", (None, None, False)),
+    ("lunch at 1:30", (None, None, False)),
+    ("room service after 11 am", (None, None, False)),
+    ("dinner at 10 pm", (None, None, False)),
+])
+def test_room_service_filters(phrase, expected):
+    assert menu_filters("room_service", phrase)[1:] == expected
+
+
+def test_breakfast_has_no_late_menu():
+    assert menu_filters("breakfast", "veg breakfast at 1 am") == ("breakfast", "veg", None, False)